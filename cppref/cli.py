@@ -1,23 +1,27 @@
 from __future__ import annotations
 
 import argparse
-import difflib
 import os
-import shlex
-import shutil
-import subprocess
 import sys
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple, TypeVar
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, List, Optional, Tuple, TypeVar
 
-from .index import BASE_URL, IndexEntry, IndexOption, SYMBOL_INDEX_URL, build_lookup, load_index, parse_symbol_index, write_index, show_index_info
+from .index import BASE_URL, FlatIndex, IndexOption, SYMBOL_INDEX_URL, load_flat_index, parse_symbol_index_stream, write_index, show_index_info
+
+if TYPE_CHECKING:
+    import curses
 
 
 def default_index_path() -> Path:
-    return Path(__file__).resolve().parent / "data" / "index.json"
+    return Path(__file__).resolve().parent / "data" / "index.json.gz"
 
 
 def open_url(url: str) -> None:
+    import shlex
+    import shutil
+    import subprocess
+
     if url.startswith("w/"):
         url = f"{BASE_URL}/{url}"
     elif url.startswith("/w/"):
@@ -41,33 +45,43 @@ def print_url(url: str) -> None:
     print(url)
 
 
-def fetch_symbol_index() -> str:
+def fetch_symbol_index(chunk_size: int = 65536) -> Iterator[str]:
+    """Yield the symbol index page as decoded text while it downloads."""
+    import codecs
     from urllib.request import urlopen
 
+    decoder = codecs.getincrementaldecoder("utf-8")()
     with urlopen(SYMBOL_INDEX_URL) as response:
-        return response.read().decode("utf-8")
+        while True:
+            chunk = response.read(chunk_size)
+            if not chunk:
+                break
+            yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
 
 
 def run_index(args: argparse.Namespace) -> None:
     if args.status:
         show_index_info(default_index_path())
         return
-    html = fetch_symbol_index()
-    entries = parse_symbol_index(html)
+    entries = parse_symbol_index_stream(fetch_symbol_index())
     output_path = default_index_path()
     write_index(entries, output_path)
     print(f"Wrote {len(entries)} entries to {output_path}")
 
 
-def load_entries() -> List[IndexEntry]:
+def existing_index_path() -> Path:
     path = default_index_path()
     if not path.exists():
         raise SystemExit(f"Index not found at {path}. Run `cppref index` first.")
-    return load_index(path)
+    return path
 
 
-def find_exact(lookup: dict, symbol: str) -> Optional[List[IndexOption]]:
-    return lookup.get(symbol)
+def find_exact(index: FlatIndex, symbol: str) -> Optional[List[IndexOption]]:
+    i = index.find(symbol)
+    if i is None:
+        return None
+    return index.options(i) or None
 
 
 def choose_url(symbol: str, options: List[IndexOption]) -> Optional[str]:
@@ -93,15 +107,15 @@ def prompt_for_choice(prompt: str) -> str:
 
 
 def run_search_non_interactive(symbol: str, *, print_only: bool = False) -> None:
-    entries = load_entries()
-    lookup = build_lookup(entries)
+    index = load_flat_index(existing_index_path())
 
     symbol = symbol.strip()
     if not symbol:
         raise SystemExit("Symbol required. Example: cppref search vector")
 
+    keys: Optional[List[str]] = None
     while True:
-        options = find_exact(lookup, symbol)
+        options = find_exact(index, symbol)
         if options:
             url = choose_url(symbol, options)
             if url:
@@ -111,16 +125,18 @@ def run_search_non_interactive(symbol: str, *, print_only: bool = False) -> None
                     open_url(url)
             return
 
-        suggestions = difflib.get_close_matches(symbol, lookup.keys(), n=1, cutoff=0.6)
-        if suggestions:
-            suggestion = suggestions[0]
+        if keys is None:
+            # Built only when a suggestion is needed, then reused across retries.
+            keys = index.keys()
+        suggestion = _best_suggestion(symbol, keys)
+        if suggestion:
             require_tty('No exact match found. Run interactively to see suggested close matches.')
             choice = prompt_for_choice(
                 f"No exact match for '{symbol}'. Did you mean '{suggestion}'? "
                 "[o]pen suggested, [s]earch again, [q]uit: "
             )
             if choice in ("", "o", "y", "yes"):
-                url = choose_url(suggestion, lookup[suggestion])
+                url = choose_url(suggestion, find_exact(index, suggestion) or [])
                 if url:
                     open_url(url)
                 return
@@ -139,70 +155,146 @@ def run_search_non_interactive(symbol: str, *, print_only: bool = False) -> None
         return
 
 
-def _match_score(symbol: str, query: str) -> Optional[int]:
-    if not query:
-        return 0
-    symbol_l = symbol.lower()
-    query_l = query.lower()
-    idx = 0
-    score = 0
-    for ch in query_l:
-        pos = symbol_l.find(ch, idx)
-        if pos == -1:
-            return None
-        score += pos
-        idx = pos + 1
-    if query_l in symbol_l:
-        score -= 10
-    return score
+def _best_suggestion(symbol: str, keys: Iterable[str], cutoff: float = 0.6) -> Optional[str]:
+    """Return the same single best match as ``difflib.get_close_matches(n=1)``.
+
+    Candidates whose length alone caps the similarity ratio below the best
+    score seen so far are skipped before any character comparison.
+    """
+    from difflib import SequenceMatcher
+
+    matcher = SequenceMatcher()
+    matcher.set_seq2(symbol)
+    symbol_len = len(symbol)
+    best: Optional[str] = None
+    best_score = cutoff
+    for key in keys:
+        key_len = len(key)
+        # Upper bound of SequenceMatcher.ratio(), same as real_quick_ratio().
+        if 2.0 * min(symbol_len, key_len) / (symbol_len + key_len) < best_score:
+            continue
+        matcher.set_seq1(key)
+        if matcher.quick_ratio() < best_score:
+            continue
+        score = matcher.ratio()
+        if score > best_score or (score == best_score and (best is None or key > best)):
+            best = key
+            best_score = score
+    return best
+
+
+@lru_cache(maxsize=256)
+def _compiled_scorer(query_l: str) -> Callable[[str], Optional[int]]:
+    """Return a scorer for ``query_l`` as a subsequence of a lowercase symbol.
+
+    Substring hits are scored by their position alone; other subsequence
+    matches by the sum of the matched positions. Lower is better, ``None``
+    means no match. The per-character loop is unrolled into generated code
+    with the query characters as literals, and cached per query.
+    """
+    if not query_l:
+        return lambda symbol_l: 0
+    lines = [
+        "def score(s):",
+        f"    p = s.find({query_l!r})",
+        "    if p != -1:",
+        "        return p - 10",
+        f"    p = s.find({query_l[0]!r})",
+        "    if p == -1:",
+        "        return None",
+        "    total = p",
+    ]
+    for ch in query_l[1:]:
+        lines += [
+            f"    p = s.find({ch!r}, p + 1)",
+            "    if p == -1:",
+            "        return None",
+            "    total += p",
+        ]
+    lines.append("    return total")
+    namespace: dict = {}
+    exec("\n".join(lines), namespace)
+    return namespace["score"]
 
 
 T = TypeVar("T")
 
 
-def _filter_entries(entries: Iterable[Tuple[str, T]], query: str) -> List[Tuple[str, T]]:
+def _lowercased(entries: Iterable[Tuple[str, T]]) -> List[Tuple[str, str, T]]:
+    return [(symbol, symbol.lower(), entry) for symbol, entry in entries]
+
+
+def _score_entries(entries: Iterable[Tuple[str, str, T]], query: str) -> List[Tuple[int, str, str, T]]:
+    """Score ``(symbol, symbol_lower, entry)`` triples as built by ``_lowercased``."""
+    score_of = _compiled_scorer(query.lower())
     scored = []
-    for symbol, entry in entries:
-        score = _match_score(symbol, query)
+    for symbol, symbol_l, entry in entries:
+        score = score_of(symbol_l)
         if score is not None:
-            scored.append((score, symbol, entry))
-    scored.sort(key=lambda item: (item[0], item[1]))
-    return [(symbol, entry) for _, symbol, entry in scored]
+            scored.append((score, symbol, symbol_l, entry))
+    return scored
+
 
+def _best_entries(scored: Iterable[Tuple[int, str, str, T]], top_n: Optional[int] = None) -> List[Tuple[str, str, T]]:
+    import heapq
 
-def _interactive_select(entries: List[Tuple[str, IndexEntry]]) -> Optional[Tuple[str, IndexEntry]]:
+    def key(item: Tuple[int, str, str, T]) -> Tuple[int, str]:
+        return item[0], item[1]
+
+    best = sorted(scored, key=key) if top_n is None else heapq.nsmallest(top_n, scored, key=key)
+    return [(symbol, symbol_l, entry) for _, symbol, symbol_l, entry in best]
+
+
+def _filter_entries(entries: Iterable[Tuple[str, str, T]], query: str, top_n: Optional[int] = None) -> List[Tuple[str, str, T]]:
+    return _best_entries(_score_entries(entries, query), top_n)
+
+
+def _interactive_select(index: FlatIndex) -> Optional[int]:
     import curses
 
-    def _inner(stdscr: "curses._CursesWindow") -> Optional[Tuple[str, IndexEntry]]:
+    entries = _lowercased(zip(index.symbols, range(len(index))))
+
+    def _inner(stdscr: "curses._CursesWindow") -> Optional[int]:
         _setup_curses(curses)
         query = ""
         selected = 0
+        scored = _score_entries(entries, query)
+        scored_query = query
+        visible: List[Tuple[str, str, int]] = []
+        visible_key = None
+
+        drawn: dict = {}
+        title = "cppref interactive search (type to filter, Enter to open, Esc to quit)"
 
         while True:
-            stdscr.erase()
-            height, width = stdscr.getmaxyx()
-            title = "cppref interactive search (type to filter, Enter to open, Esc to quit)"
-            stdscr.addnstr(0, 0, title, width - 1)
-            stdscr.addnstr(1, 0, f"Query: {query}", width - 1)
-
-            matches = _filter_entries(entries, query)
-            visible = matches[: max(1, height - 3)]
+            height, _ = stdscr.getmaxyx()
+            if query != scored_query:
+                # Extending the query can only narrow the subsequence matches,
+                # so rescore the previous matches instead of every entry.
+                if query.startswith(scored_query):
+                    source = [(symbol, symbol_l, i) for _, symbol, symbol_l, i in scored]
+                else:
+                    source = entries
+                scored = _score_entries(source, query)
+                scored_query = query
+            if visible_key != (query, height):
+                visible = _best_entries(scored, max(1, height - 3))
+                visible_key = (query, height)
             if selected >= len(visible):
                 selected = max(0, len(visible) - 1)
 
-            for idx, (symbol, entry) in enumerate(visible):
-                prefix = "> " if idx == selected else "  "
-                suffix = f" ({len(entry.options)})" if len(entry.options) > 1 else ""
-                stdscr.addnstr(2 + idx, 0, f"{prefix}{symbol}{suffix}", width - 1)
-
-            stdscr.refresh()
+            rows = [
+                f"{symbol} ({index.option_count(i)})" if index.option_count(i) > 1 else symbol
+                for symbol, _, i in visible
+            ]
+            _render_list(curses, stdscr, drawn, title, query, rows, selected)
             key = stdscr.getch()
 
             if key in (27, ):
                 return None
             if key in (curses.KEY_ENTER, 10, 13):
                 if visible:
-                    return visible[selected]
+                    return visible[selected][2]
                 continue
             if key in (curses.KEY_UP,):
                 selected = max(0, selected - 1)
@@ -210,12 +302,8 @@ def _interactive_select(entries: List[Tuple[str, IndexEntry]]) -> Optional[Tuple
             if key in (curses.KEY_DOWN,):
                 selected = min(len(visible) - 1, selected + 1)
                 continue
-            if key in (curses.KEY_BACKSPACE, 127, 8):
-                query = query[:-1]
-                selected = 0
-                continue
-            if 32 <= key <= 126:
-                query += chr(key)
+            if key in (curses.KEY_BACKSPACE, 127, 8) or 32 <= key <= 126:
+                query = _read_query_edits(curses, stdscr, key, query)
                 selected = 0
 
     return curses.wrapper(_inner)
@@ -228,48 +316,103 @@ def _select_option_curses(symbol: str, options: List[IndexOption]) -> Optional[I
         _setup_curses(curses)
         query = ""
         selected = 0
+        filtered = _lowercased((option.label, option) for option in options)
+
+        drawn: dict = {}
+        title = f"Select match for {symbol} (type to filter, Enter to open, Esc to quit)"
 
         while True:
-            stdscr.erase()
-            height, width = stdscr.getmaxyx()
-            title = f"Select match for {symbol} (type to filter, Enter to open, Esc to quit)"
-            stdscr.addnstr(0, 0, title, width - 1)
-            stdscr.addnstr(1, 0, f"Query: {query}", width - 1)
-
-            filtered = [(option.label, option) for option in options]
-            matches = _filter_entries(filtered, query)
-            visible = matches[: max(1, height - 3)]
+            height, _ = stdscr.getmaxyx()
+            visible = _filter_entries(filtered, query, max(1, height - 3))
             if selected >= len(visible):
                 selected = max(0, len(visible) - 1)
 
-            for idx, (_, option) in enumerate(visible):
-                prefix = "> " if idx == selected else "  "
-                stdscr.addnstr(2 + idx, 0, f"{prefix}{option.label}", width - 1)
-
-            stdscr.refresh()
+            rows = [option.label for _, _, option in visible]
+            _render_list(curses, stdscr, drawn, title, query, rows, selected)
             key = stdscr.getch()
 
             if key in (27, ):
                 return None
             if key in (curses.KEY_ENTER, 10, 13):
-                return visible[selected][1] if visible else None
+                return visible[selected][2] if visible else None
             if key in (curses.KEY_UP,):
                 selected = max(0, selected - 1)
                 continue
             if key in (curses.KEY_DOWN,):
                 selected = min(len(visible) - 1, selected + 1)
                 continue
-            if key in (curses.KEY_BACKSPACE, 127, 8):
-                query = query[:-1]
-                selected = 0
-                continue
-            if 32 <= key <= 126:
-                query += chr(key)
+            if key in (curses.KEY_BACKSPACE, 127, 8) or 32 <= key <= 126:
+                query = _read_query_edits(curses, stdscr, key, query)
                 selected = 0
 
     return curses.wrapper(_inner)
 
 
+def _read_query_edits(curses_module, stdscr: "curses._CursesWindow", key: int, query: str) -> str:
+    """Apply ``key`` and any query edits already waiting in the input queue.
+
+    A burst of typing is coalesced so the list is refiltered once for the
+    final query. The first key that is not an edit is pushed back for the
+    caller's loop to handle against the refreshed list.
+    """
+    stdscr.nodelay(True)
+    try:
+        while True:
+            if key in (curses_module.KEY_BACKSPACE, 127, 8):
+                query = query[:-1]
+            elif 32 <= key <= 126:
+                query += chr(key)
+            else:
+                if key != -1:
+                    curses_module.ungetch(key)
+                return query
+            key = stdscr.getch()
+    finally:
+        stdscr.nodelay(False)
+
+
+def _render_list(curses_module, stdscr: "curses._CursesWindow", drawn: dict, title: str, query: str, rows: List[str], selected: int) -> None:
+    """Repaint only the lines that changed since the previous frame.
+
+    ``drawn`` holds the state of the last frame and is updated in place. A
+    resize repaints everything, a query change repaints the query line and
+    the list, and moving the selection repaints just the old and new rows.
+    """
+    height, width = stdscr.getmaxyx()
+    if drawn.get("size") != (height, width):
+        stdscr.erase()
+        stdscr.addnstr(0, 0, title, width - 1)
+        drawn.clear()
+        drawn["size"] = (height, width)
+
+    if drawn.get("query") != query:
+        _draw_line(stdscr, 1, f"Query: {query}", width)
+        for idx, text in enumerate(rows):
+            _draw_line(stdscr, 2 + idx, _row_text(text, idx == selected), width)
+        if 2 + len(rows) < height:
+            stdscr.move(2 + len(rows), 0)
+            stdscr.clrtobot()
+        drawn["query"] = query
+    elif drawn.get("selected") != selected:
+        for row in (drawn.get("selected"), selected):
+            if row is not None and 0 <= row < len(rows):
+                _draw_line(stdscr, 2 + row, _row_text(rows[row], row == selected), width)
+    drawn["selected"] = selected
+
+    stdscr.noutrefresh()
+    curses_module.doupdate()
+
+
+def _row_text(text: str, is_selected: bool) -> str:
+    return f"{'> ' if is_selected else '  '}{text}"
+
+
+def _draw_line(stdscr: "curses._CursesWindow", y: int, text: str, width: int) -> None:
+    stdscr.move(y, 0)
+    stdscr.clrtoeol()
+    stdscr.addnstr(y, 0, text, width - 1)
+
+
 def _setup_curses(curses_module) -> None:
     curses_module.curs_set(0)
     if hasattr(curses_module, "set_escdelay"):
@@ -278,12 +421,11 @@ def _setup_curses(curses_module) -> None:
 
 def run_search_interactive(*, print_only: bool = False) -> None:
     require_tty('Interactive mode must be run in a terminal.')
-    entries = load_entries()
-    selection = _interactive_select([(entry.symbol, entry) for entry in entries])
-    if not selection:
+    index = load_flat_index(existing_index_path())
+    selection = _interactive_select(index)
+    if selection is None:
         return
-    symbol, entry = selection
-    url = choose_url(symbol, entry.options)
+    url = choose_url(index.symbols[selection], index.options(selection))
     if url:
         if print_only:
             print_url(url)
@@ -1,31 +1,103 @@
 from __future__ import annotations
 
+from array import array
+from bisect import bisect_left
+import gzip
 import json
-from dataclasses import dataclass
+import pickle
 from html.parser import HTMLParser
+from itertools import chain
 from pathlib import Path
 import posixpath
+import re
 from urllib.parse import urlsplit
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
 from datetime import datetime
 
 BASE_URL = "https://cppreference.com"
 SYMBOL_INDEX_URL = f"{BASE_URL}/w/cpp/symbol_index.html"
 SYMBOL_INDEX_PATH = "w/cpp/symbol_index.html"
 INDEX_VERSION = 1
+LOOKUP_CACHE_VERSION = 2
 
-@dataclass(frozen=True)
-class IndexOption:
+_CLEAN_SYMBOL_TABLE = str.maketrans("", "", "()<>")
+_SPACE_RUN_RE = re.compile(r" {2,}")
+_GZIP_MAGIC = b"\x1f\x8b"
+
+class IndexOption(NamedTuple):
     label: str
     url: str
 
 
-@dataclass(frozen=True)
-class IndexEntry:
+class IndexEntry(NamedTuple):
     symbol: str
     options: List[IndexOption]
 
 
+class FlatIndex:
+    """Symbol index stored as parallel arrays instead of one list per symbol.
+
+    The options of ``symbols[i]`` are ``labels[offsets[i]:offsets[i + 1]]``
+    paired with the same slice of ``urls``; ``IndexOption`` objects are only
+    built when a symbol's options are requested. ``symbols`` is sorted so
+    lookups can bisect it instead of building a dict.
+    """
+
+    __slots__ = ("symbols", "offsets", "labels", "urls")
+
+    def __init__(self, symbols: List[str], offsets: "array[int]", labels: List[str], urls: List[str]) -> None:
+        self.symbols = symbols
+        self.offsets = offsets
+        self.labels = labels
+        self.urls = urls
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[IndexEntry]) -> "FlatIndex":
+        symbols: List[str] = []
+        offsets = array("i", [0])
+        labels: List[str] = []
+        urls: List[str] = []
+        for entry in sorted(entries, key=lambda entry: entry.symbol):
+            symbols.append(entry.symbol)
+            for option in entry.options:
+                labels.append(option.label)
+                urls.append(option.url)
+            offsets.append(len(labels))
+        return cls(symbols, offsets, labels, urls)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def option_count(self, i: int) -> int:
+        return self.offsets[i + 1] - self.offsets[i]
+
+    def options(self, i: int) -> List[IndexOption]:
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return [IndexOption(label=label, url=url) for label, url in zip(self.labels[start:end], self.urls[start:end])]
+
+    def _position(self, symbol: str) -> Optional[int]:
+        i = bisect_left(self.symbols, symbol)
+        if i < len(self.symbols) and self.symbols[i] == symbol:
+            return i
+        return None
+
+    def find(self, symbol: str) -> Optional[int]:
+        """Return the position of ``symbol`` or of its ``std::`` qualified form."""
+        i = self._position(symbol)
+        if i is None:
+            i = self._position(f"std::{symbol}")
+        return i
+
+    def keys(self) -> List[str]:
+        """Return every searchable name, including unqualified ``std::`` aliases."""
+        aliases = [
+            symbol[5:]
+            for symbol in self.symbols
+            if symbol.startswith("std::") and self._position(symbol[5:]) is None
+        ]
+        return self.symbols + aliases
+
+
 class _SymbolIndexParser(HTMLParser):
     def __init__(self) -> None:
         super().__init__()
@@ -35,9 +107,14 @@ class _SymbolIndexParser(HTMLParser):
         self._pending_label_base: Optional[str] = None
         self._pending_url: Optional[str] = None
         self._pending_tail_parts: List[str] = []
+        # Text is buffered until the next tag so that chunked input, which
+        # can split a text run in two, parses the same as a single string.
+        self._data_parts: List[str] = []
         self.entries: Dict[str, List[IndexOption]] = {}
+        self._seen: Set[Tuple[str, str, str]] = set()
 
     def handle_starttag(self, tag: str, attrs: List[tuple]) -> None:
+        self._flush_data()
         if tag == "br":
             self._finalize_pending()
             return
@@ -54,6 +131,19 @@ class _SymbolIndexParser(HTMLParser):
             self._current_text_parts = []
 
     def handle_data(self, data: str) -> None:
+        self._data_parts.append(data)
+
+    def handle_comment(self, data: str) -> None:
+        self._flush_data()
+
+    def handle_pi(self, data: str) -> None:
+        self._flush_data()
+
+    def _flush_data(self) -> None:
+        if not self._data_parts:
+            return
+        data = "".join(self._data_parts)
+        self._data_parts = []
         if self._current_href is None:
             if self._pending_url is None:
                 return
@@ -66,6 +156,7 @@ class _SymbolIndexParser(HTMLParser):
             self._current_text_parts.append(text)
 
     def handle_endtag(self, tag: str) -> None:
+        self._flush_data()
         if tag != "a" or self._current_href is None:
             return
         raw_text = "".join(self._current_text_parts).strip()
@@ -88,8 +179,9 @@ class _SymbolIndexParser(HTMLParser):
         self._pending_tail_parts = []
 
     def close(self) -> None:
-        self._finalize_pending()
         super().close()
+        self._flush_data()
+        self._finalize_pending()
 
     def _finalize_pending(self) -> None:
         if not self._pending_symbol or not self._pending_url:
@@ -104,10 +196,10 @@ class _SymbolIndexParser(HTMLParser):
         if tail:
             label = f"{label} {tail}"
 
-        options = self.entries.setdefault(self._pending_symbol, [])
-        option = IndexOption(label=label, url=self._pending_url)
-        if all(existing.url != option.url or existing.label != option.label for existing in options):
-            options.append(option)
+        key = (self._pending_symbol, label, self._pending_url)
+        if key not in self._seen:
+            self._seen.add(key)
+            self.entries.setdefault(self._pending_symbol, []).append(IndexOption(label=label, url=self._pending_url))
 
         self._pending_symbol = None
         self._pending_label_base = None
@@ -144,7 +236,7 @@ def _normalize_href(href: str) -> Optional[str]:
 def _clean_symbol(symbol: str) -> str:
     if not symbol:
         return symbol
-    return symbol.translate({ord("("): None, ord(")"): None, ord("<"): None, ord(">"): None}).strip()
+    return symbol.translate(_CLEAN_SYMBOL_TABLE).strip()
 
 
 def _normalize_tail(parts: List[str]) -> str:
@@ -152,14 +244,73 @@ def _normalize_tail(parts: List[str]) -> str:
         return ""
     tail = " ".join(parts).strip()
     tail = tail.replace("( ", "(").replace(" )", ")")
-    while "  " in tail:
-        tail = tail.replace("  ", " ")
-    return tail
+    return _SPACE_RUN_RE.sub(" ", tail)
+
+
+def _feed_lxml(parser: _SymbolIndexParser, chunks: Iterator[str], received: List[str]) -> bool:
+    """Feed ``parser`` from an lxml parse tree if lxml is available.
+
+    lxml tokenizes in C as chunks arrive; the finished tree is replayed
+    through the same callbacks in document order so both paths extract
+    identical entries. Consumed chunks are kept in ``received`` so the
+    caller can fall back to ``HTMLParser`` when this returns False.
+    """
+    try:
+        from lxml import etree
+        from lxml import html as lxml_html
+    except ImportError:
+        return False
+    tree_parser = lxml_html.HTMLParser()
+    # Only lxml's own failures trigger the fallback; errors raised while
+    # pulling from ``chunks`` (e.g. a bad download) must propagate.
+    for chunk in chunks:
+        received.append(chunk)
+        try:
+            tree_parser.feed(chunk)
+        except (ValueError, etree.LxmlError):
+            return False
+    try:
+        root = tree_parser.close()
+    except (ValueError, etree.LxmlError):
+        return False
+    if root is None:
+        return False
+    # Comments and PIs are only reported when asked for; their tail text
+    # belongs to the surrounding label just like on the HTMLParser path.
+    for event, element in etree.iterwalk(root, events=("start", "end", "comment", "pi")):
+        if event == "start":
+            parser.handle_starttag(element.tag, list(element.attrib.items()))
+            if element.text:
+                parser.handle_data(element.text)
+            continue
+        if event == "end":
+            parser.handle_endtag(element.tag)
+        elif event == "comment":
+            parser.handle_comment(element.text or "")
+        else:
+            parser.handle_pi(element.text or "")
+        if element.tail:
+            parser.handle_data(element.tail)
+    return True
 
 
 def parse_symbol_index(html: str) -> List[IndexEntry]:
+    """Parse a symbol index page that is already in memory.
+
+    Public counterpart of ``parse_symbol_index_stream`` for callers that hold
+    the whole page, such as a saved copy; the CLI streams the download.
+    """
+    return parse_symbol_index_stream([html])
+
+
+def parse_symbol_index_stream(chunks: Iterable[str]) -> List[IndexEntry]:
+    """Parse the symbol index from text chunks, e.g. as they are downloaded."""
     parser = _SymbolIndexParser()
-    parser.feed(html)
+    chunks = iter(chunks)
+    received: List[str] = []
+    if not _feed_lxml(parser, chunks, received):
+        for chunk in chain(received, chunks):
+            parser.feed(chunk)
     parser.close()
     return [IndexEntry(symbol=k, options=v) for k, v in sorted(parser.entries.items())]
 
@@ -167,30 +318,55 @@ def parse_symbol_index(html: str) -> List[IndexEntry]:
 def write_index(entries: Iterable[IndexEntry], path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     merged: Dict[str, List[IndexOption]] = {}
+    seen: Set[Tuple[str, str, str]] = set()
     for entry in entries:
         options = merged.setdefault(entry.symbol, [])
         for option in entry.options:
-            if all(existing.url != option.url or existing.label != option.label for existing in options):
+            key = (entry.symbol, option.label, option.url)
+            if key not in seen:
+                seen.add(key)
                 options.append(option)
+    # Metadata is written ahead of the entries array so that readers such as
+    # _read_index_info can stop before reaching the entries.
     payload = {
-        "index_version": INDEX_VERSION,
-        "index_time": datetime.utcnow().isoformat() + "Z",
         "base_url": BASE_URL,
+        "entry_count": len(merged),
+        "index_time": datetime.utcnow().isoformat() + "Z",
+        "index_version": INDEX_VERSION,
         "entries": [
             {
-                "symbol": symbol,
                 "options": [
                     {"label": option.label, "url": option.url} for option in options
                 ],
+                "symbol": symbol,
             }
             for symbol, options in sorted(merged.items())
         ]
     }
-    path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    text = json.dumps(payload, indent=2) + "\n"
+    if path.suffix == ".gz":
+        with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(text)
+    else:
+        path.write_text(text, encoding="utf-8")
+    _write_lookup_cache(path, FlatIndex.from_entries(IndexEntry(symbol=symbol, options=options) for symbol, options in merged.items()))
+
+
+def _sidecar_path(path: Path, suffix: str) -> Path:
+    if path.suffix == ".gz":
+        path = path.with_suffix("")
+    return path.with_suffix(suffix)
+
+
+def _read_index_text(path: Path) -> str:
+    data = path.read_bytes()
+    if data[:2] == _GZIP_MAGIC:
+        data = gzip.decompress(data)
+    return data.decode("utf-8")
 
 
 def load_index(path: Path) -> List[IndexEntry]:
-    data = json.loads(path.read_text(encoding="utf-8"))
+    data = json.loads(_read_index_text(path))
     entries: List[IndexEntry] = []
     for item in data.get("entries", []):
         symbol = item.get("symbol")
@@ -216,25 +392,99 @@ def load_index(path: Path) -> List[IndexEntry]:
     return entries
 
 
-def build_lookup(entries: Iterable[IndexEntry]) -> Dict[str, List[IndexOption]]:
-    lookup: Dict[str, List[IndexOption]] = {}
-    for entry in entries:
-        lookup.setdefault(entry.symbol, entry.options)
-        if entry.symbol.startswith("std::"):
-            alias = entry.symbol[len("std::") :]
-            lookup.setdefault(alias, entry.options)
-    return lookup
+def lookup_cache_path(path: Path) -> Path:
+    return _sidecar_path(path, ".pkl")
+
+
+def _write_lookup_cache(path: Path, index: FlatIndex) -> None:
+    payload = {
+        "cache_version": LOOKUP_CACHE_VERSION,
+        "mtime": path.stat().st_mtime_ns,
+        "index": (index.symbols, index.offsets, index.labels, index.urls),
+    }
+    try:
+        with lookup_cache_path(path).open("wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        # The index may live in a read-only install location; the cache is optional.
+        pass
+
+
+def _read_lookup_cache(path: Path) -> Optional[FlatIndex]:
+    try:
+        mtime = path.stat().st_mtime_ns
+        with lookup_cache_path(path).open("rb") as f:
+            payload = pickle.load(f)
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        return None
+    if not isinstance(payload, dict):
+        return None
+    if payload.get("cache_version") != LOOKUP_CACHE_VERSION or payload.get("mtime") != mtime:
+        return None
+    return FlatIndex(*payload["index"])
+
+
+def load_flat_index(path: Path) -> FlatIndex:
+    """Return the index at ``path`` as a ``FlatIndex``.
+
+    Uses the pickled sidecar cache when it matches the index mtime, otherwise
+    parses the index and refreshes the cache.
+    """
+    index = _read_lookup_cache(path)
+    if index is not None:
+        return index
+    index = FlatIndex.from_entries(load_index(path))
+    _write_lookup_cache(path, index)
+    return index
+
+
+def _read_index_info(path: Path) -> Tuple[object, object, int]:
+    """Return ``(index_version, index_time, entry count)`` for the index at ``path``.
+
+    With ijson installed the file is streamed and reading stops once the
+    metadata written ahead of the entries has been seen; older indexes that
+    store it after the entries are streamed to the end with entries only
+    counted. Without ijson the whole document is parsed.
+    """
+    try:
+        import ijson
+    except ImportError:
+        obj = json.loads(_read_index_text(path))
+        entries = obj.get("entries", [])
+        return obj.get("index_version", "unknown"), obj.get("index_time", "unknown"), obj.get("entry_count", len(entries))
+
+    with path.open("rb") as f:
+        opener = gzip.open if f.read(2) == _GZIP_MAGIC else open
+    version: object = None
+    time: object = None
+    entry_count: Optional[int] = None
+    counted = 0
+    with opener(path, "rb") as f:
+        for prefix, event, value in ijson.parse(f):
+            if prefix == "entries.item" and event == "start_map":
+                counted += 1
+            elif prefix == "index_version":
+                version = value
+            elif prefix == "index_time":
+                time = value
+            elif prefix == "entry_count":
+                entry_count = value
+            else:
+                continue
+            if version is not None and time is not None and entry_count is not None:
+                break
+    return (
+        "unknown" if version is None else version,
+        "unknown" if time is None else time,
+        entry_count if entry_count is not None else counted,
+    )
 
 
 def show_index_info(path: Path) -> None:
     if not path.exists():
         raise SystemExit(f"Index not found at {path}. Run `cppref index` first.")
-    data = path.read_text(encoding="utf-8")
-    obj = json.loads(data)
-    version = obj.get("index_version", "unknown")
-    time = obj.get("index_time", "unknown")
-    entries = obj.get("entries", [])
+    version, time, count = _read_index_info(path)
     print(f"Index path: {path}")
     print(f"Index version: {version}")
     print(f"Index time: {time}")
-    print(f"Number of entries: {len(entries)}")
\ No newline at end of file
+    print(f"Number of entries: {count}")
\ No newline at end of file